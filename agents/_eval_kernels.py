@@ -0,0 +1,67 @@
+"""
+_eval_kernels.py
+
+Numba-compiled numeric kernels for the evaluation agent. Importing this module
+is safe when numba is not installed; callers check HAVE_NUMBA and fall back to
+the vectorized NumPy path. The explicit signature triggers compilation at
+import time (with on-disk caching) so sessions never pay JIT warmup mid-run.
+"""
+
+import numpy as np
+
+try:  # pragma: no cover
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover
+    HAVE_NUMBA = False
+
+_KERNEL_SIGNATURE = (
+    "Tuple((float64[:], boolean[:], boolean[:], boolean[:], float64[:]))"
+    "(float64[:, :], float64[:, :], float64[:, :])"
+)
+
+
+def _score_kernel(angles, elbow_y, shoulder_y):
+    """
+    Per-shot scoring over (n_shots, group_size) blocks.
+
+    Returns (avg_angle, angle_undetected, angle_bad, posture_bad, score)
+    arrays; NaN entries mark missing detections and never trip comparisons.
+    """
+    n_shots = angles.shape[0]
+    group_size = angles.shape[1]
+    avg_angle = np.full(n_shots, np.nan)
+    angle_undetected = np.zeros(n_shots, np.bool_)
+    angle_bad = np.zeros(n_shots, np.bool_)
+    posture_bad = np.zeros(n_shots, np.bool_)
+    score = np.full(n_shots, 100.0)
+    for shot in range(n_shots):
+        total = 0.0
+        count = 0
+        for frame in range(group_size):
+            angle = angles[shot, frame]
+            if not np.isnan(angle):
+                total += angle
+                count += 1
+            if shoulder_y[shot, frame] - elbow_y[shot, frame] > 30.0:
+                posture_bad[shot] = True
+        if count == 0:
+            angle_undetected[shot] = True
+            score[shot] -= 30.0
+        else:
+            avg = total / count
+            avg_angle[shot] = avg
+            if avg < 30.0 or avg > 110.0:
+                angle_bad[shot] = True
+                score[shot] -= 20.0
+        if posture_bad[shot]:
+            score[shot] -= 10.0
+        if score[shot] < 0.0:
+            score[shot] = 0.0
+    return avg_angle, angle_undetected, angle_bad, posture_bad, score
+
+
+if HAVE_NUMBA:
+    score_kernel = njit(_KERNEL_SIGNATURE, cache=True)(_score_kernel)
+else:
+    score_kernel = _score_kernel
@@ -0,0 +1,78 @@
+"""
+_prompt_compact.py
+
+Token-budgeted compaction of evaluation payloads before they are embedded in
+LLM prompts. A fixed-count slice is oblivious to payload size: twelve
+evaluations can be 500 or 50,000 tokens depending on embedded frame lists.
+Compaction strips high-redundancy fields, collapses evaluations that share an
+issue signature into one representative plus a count, and trims to an
+approximate token budget.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import orjson
+
+# Coarse serialized-chars-per-token heuristic; good enough for budgeting
+# without pulling in a tokenizer dependency.
+_CHARS_PER_TOKEN = 4
+_MAX_ARRAY_ITEMS = 8
+
+# Per-frame dumps carry no signal the aggregated stats don't already have.
+_DROP_FIELDS = ("frames", "keypoints")
+
+
+def _estimate_tokens(obj: Any) -> int:
+    return len(orjson.dumps(obj)) // _CHARS_PER_TOKEN
+
+
+def _slim(evaluation: Dict[str, Any]) -> Dict[str, Any]:
+    slim: Dict[str, Any] = {}
+    for key, value in evaluation.items():
+        if key in _DROP_FIELDS:
+            continue
+        if (
+            isinstance(value, (list, tuple))
+            and len(value) > _MAX_ARRAY_ITEMS
+            and all(isinstance(item, (int, float)) for item in value)
+        ):
+            continue
+        slim[key] = value
+    return slim
+
+
+def compact_evals(
+    evaluations: List[Dict[str, Any]],
+    *,
+    max_tokens: int = 3000,
+) -> List[Dict[str, Any]]:
+    """
+    Compress evaluations to fit an approximate token budget.
+
+    Evaluations with identical issue signatures collapse into one entry with a
+    representative sample and an occurrence count; if the result still exceeds
+    the budget, the oldest groups are dropped first. Always keeps at least one
+    group so the prompt is never empty.
+    """
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for evaluation in evaluations:
+        signature = tuple(evaluation.get("issues", ()))
+        group = groups.get(signature)
+        if group is None:
+            groups[signature] = {"representative": _slim(evaluation), "count": 1}
+        else:
+            group["count"] += 1
+
+    compact = [
+        {
+            "issues": list(signature),
+            "occurrences": group["count"],
+            "representative": group["representative"],
+        }
+        for signature, group in groups.items()
+    ]
+    while len(compact) > 1 and _estimate_tokens(compact) > max_tokens:
+        compact.pop(0)
+    return compact
@@ -0,0 +1,38 @@
+"""
+_router.py
+
+Cheap pre-call model routing. Most sessions don't need the larger model: an
+evaluation set with no flagged issues needs no LLM at all, and small issue
+sets are well within the lite tier's ability. The decision is a constant-time
+scan over the evaluations, traded against a large cost difference per call.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional
+
+from agents.gemini_utils import DEFAULT_MODEL, MODEL_ENV
+
+# Sentinel: the caller should answer deterministically without an LLM call.
+RULE_BASED = "rule-based"
+
+COMPLEX_MODEL_ENV = "COACH_COMPLEX_MODEL_NAME"
+DEFAULT_COMPLEX_MODEL = "gemini-2.5-flash"
+
+# Thresholds for the lite tier.
+_SIMPLE_MAX_EVALS = 3
+_SIMPLE_MAX_ISSUES = 5
+
+
+def pick_model(
+    evaluations: List[Dict[str, Any]],
+    tool_context: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Return RULE_BASED, the lite model name, or the complex model name."""
+    issue_count = sum(len(e.get("issues", ())) for e in evaluations)
+    if issue_count == 0:
+        return RULE_BASED
+    if len(evaluations) <= _SIMPLE_MAX_EVALS and issue_count <= _SIMPLE_MAX_ISSUES:
+        return os.getenv(MODEL_ENV, DEFAULT_MODEL)
+    return os.getenv(COMPLEX_MODEL_ENV, DEFAULT_COMPLEX_MODEL)
@@ -6,12 +6,18 @@ LLM coach that produces drills and schedules from evaluation data.
 
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, List, Optional
 
+import orjson
+
+from agents._prompt_compact import compact_evals
+from agents._router import RULE_BASED, pick_model
 from agents.gemini_utils import create_model, response_to_json
 
-EVAL_LIMIT = 12
+EVAL_TOKEN_BUDGET = 3000
+# No max_output_tokens cap on plan generation: on Gemini 2.5 models the cap
+# counts thinking tokens too, and the complex route (gemini-2.5-flash) thinks
+# by default — a tight budget can leave an empty text part and fail parsing.
 
 STRICT_INSTRUCTIONS = """
 You are an elite table-tennis coach. Follow these rules exactly:
@@ -33,6 +39,65 @@ You are an elite table-tennis coach. Follow these rules exactly:
 5. Violating the schema or adding extra text makes the answer invalid.
 """
 
+SCHEMA_GUIDE = """
+Field-by-field guidance:
+- summary: one paragraph tying the plan to the player's measured weaknesses.
+  Name the dominant issue, the average score, and the expected improvement.
+- drills[].name: a short memorable title, e.g. "Open-Face Progression".
+- drills[].description: concrete setup and execution steps a player can follow
+  alone or with a feeder. Mention table position, ball placement, and tempo.
+- drills[].focus: the single technique element the drill targets, phrased to
+  match an issue from the evaluations (e.g. "racket angle at contact").
+- drills[].repetitions: explicit volume such as "5 sets x 15 balls" or
+  "10 minutes continuous"; never vague phrases like "as many as possible".
+- schedule[].day: integer day of a 7-day microcycle (1 = first session).
+- schedule[].focus: which drill(s) that session emphasizes and why, in one
+  sentence referencing the diagnostics.
+
+Worked example (for a player whose evaluations show an average score of 62,
+"Racket angle (118.0°) might be suboptimal" on 4 of 6 shots, and elbow-height
+posture flags):
+{
+  "summary": "Your average shot score of 62 is driven by a closed racket face (118° on 4 of 6 shots) and a high elbow that costs you control; two weeks of face-angle and alignment work should lift rally consistency noticeably.",
+  "drills": [
+    {"name": "Open-Face Progression", "description": "Multi-ball pushes from the backhand corner; feeder gives medium backspin, player holds the racket between 45°-80° and checks the face in a mirror between sets.", "focus": "racket angle at contact", "repetitions": "5 sets x 15 balls"},
+    {"name": "Elbow Ladder Drill", "description": "Shadow-swing forehands in front of a mirror, pausing at contact position to verify the elbow stays below shoulder height.", "focus": "shoulder-elbow-wrist alignment", "repetitions": "3 sets x 12 swings"}
+  ],
+  "schedule": [
+    {"day": 1, "focus": "Open-Face Progression to attack the 118° face angle flagged in 4 shots"},
+    {"day": 3, "focus": "Elbow Ladder Drill for the high-elbow posture issue, then 2 sets of Open-Face Progression"},
+    {"day": 5, "focus": "Combine both drills and finish with free rallying to transfer the corrections"}
+  ]
+}
+The example illustrates tone and specificity only; your content must come from
+the data after the --- separator.
+"""
+
+# Static prefix sent byte-identical on every call so Gemini's implicit context
+# cache can hit (the cache requires a >=1024-token shared prefix). Per-session
+# data is appended after the separator.
+PROMPT_PREFIX = STRICT_INSTRUCTIONS.strip() + "\n" + SCHEMA_GUIDE.strip()
+PROMPT_SEPARATOR = "\n---\n"
+
+# Sorted keys keep the serialized payload byte-stable across runs so identical
+# sessions hit the same cached prefix. Compact output (no indentation):
+# whitespace is billed like any other token.
+_PAYLOAD_OPTS = orjson.OPT_SORT_KEYS
+
+# Header concatenated once at import; call sites only serialize the suffix.
+_PROMPT_HEADER = PROMPT_PREFIX + PROMPT_SEPARATOR
+
+
+def build_prompt(
+    evaluations: List[Dict[str, Any]],
+    *,
+    tool_context: Dict[str, Any],
+    insights: Optional[Dict[str, Any]] = None,
+    user_profile: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Build the coaching prompt; shared by the interactive path and batch mode."""
+    return _build_prompt(evaluations, user_profile or {}, tool_context, insights)
+
 
 def generate_coaching_plan(
     evaluations: List[Dict[str, Any]],
@@ -42,26 +107,74 @@ def generate_coaching_plan(
     user_profile: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     user_profile = user_profile or {}
+    model_name = pick_model(evaluations, tool_context)
+    if model_name == RULE_BASED:
+        return _rule_based_plan(tool_context)
     prompt = _build_prompt(evaluations, user_profile, tool_context, insights)
-    model = create_model()
+    model = create_model(model_name=model_name)
     response = model.generate_content(prompt)
     plan = response_to_json(response)
     plan["llm_used"] = True
     return plan
 
 
+async def generate_coaching_plan_async(
+    evaluations: List[Dict[str, Any]],
+    *,
+    tool_context: Dict[str, Any],
+    insights: Optional[Dict[str, Any]] = None,
+    user_profile: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Async mirror of generate_coaching_plan for event-loop driven batch runs."""
+    model_name = pick_model(evaluations, tool_context)
+    if model_name == RULE_BASED:
+        return _rule_based_plan(tool_context)
+    prompt = _build_prompt(evaluations, user_profile or {}, tool_context, insights)
+    model = create_model(model_name=model_name)
+    response = await model.generate_content_async(prompt)
+    plan = response_to_json(response)
+    plan["llm_used"] = True
+    return plan
+
+
+def _rule_based_plan(tool_context: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic plan for clean sessions — no issues means no LLM call."""
+    drills = []
+    for entry in tool_context.get("drill_lookup", []):
+        drills.extend(entry.get("drills", []))
+    # de-duplicate by name while preserving order
+    drills = list({drill.get("name"): drill for drill in drills}.values())
+    if not drills:
+        drills = [
+            {
+                "name": "Consistency Loop",
+                "description": "Alternate FH/BH control shots aiming for high rally count.",
+                "focus": "overall consistency",
+                "repetitions": "10 minutes continuous",
+            }
+        ]
+    schedule = [
+        {"day": day, "focus": drills[i % len(drills)].get("name", "General consistency")}
+        for i, day in enumerate((1, 3, 5))
+    ]
+    return {
+        "summary": "No technique issues were flagged in this clip, so keep consolidating with general consistency work.",
+        "drills": drills,
+        "schedule": schedule,
+        "llm_used": False,
+    }
+
+
 def _build_prompt(
     evaluations: List[Dict[str, Any]],
     user_profile: Dict[str, Any],
     tool_context: Dict[str, Any],
     insights: Optional[Dict[str, Any]],
 ) -> str:
-    compact_evals = evaluations[:EVAL_LIMIT]
     payload = {
-        "system_rules": STRICT_INSTRUCTIONS.strip(),
         "user_profile": user_profile,
-        "evaluation_samples": compact_evals,
+        "evaluation_samples": compact_evals(evaluations, max_tokens=EVAL_TOKEN_BUDGET),
         "tool_context": tool_context,
         "insights_summary": insights or {},
     }
-    return json.dumps(payload, indent=2)
+    return _PROMPT_HEADER + orjson.dumps(payload, option=_PAYLOAD_OPTS).decode()
@@ -7,51 +7,82 @@ Generates a structured evaluation report per shot/sequence.
 
 import numpy as np
 
+from agents import _eval_kernels
+
 def score_shots(detections, user_metadata=None):
     """Group detections into shots (very simple heuristic based on motion) and score each shot.
     Returns [{'shot_id': int, 'score': float, 'issues': [...], 'suggestions': [...]}, ...]
     """
-    shots = []
     # naive grouping: every N frames -> a shot.
     group_size = 10
-    for i in range(0, len(detections), group_size):
-        block = detections[i:i+group_size]
-        angles = []
-        for d in block:
-            angle = d.get('racket_angle')
-            angles.append(angle if angle is not None else np.nan)
-        avg_angle = np.nanmean(angles) if angles else np.nan
+    n = len(detections)
+    if n == 0:
+        return []
+
+    # Build struct-of-arrays views once so the per-shot stats are a handful of
+    # vectorized reductions instead of per-frame Python loops.
+    angles = np.full(n, np.nan, dtype=np.float64)
+    elbow_y = np.full(n, np.nan, dtype=np.float64)
+    shoulder_y = np.full(n, np.nan, dtype=np.float64)
+    for i, d in enumerate(detections):
+        angle = d.get('racket_angle')
+        if angle is not None:
+            angles[i] = angle
+        k = d.get('keypoints') or {}
+        if k.get('left_elbow') and k.get('left_shoulder'):
+            elbow_y[i] = k['left_elbow'][1]
+            shoulder_y[i] = k['left_shoulder'][1]
+
+    # Pad with NaN so the arrays reshape cleanly into (n_shots, group_size).
+    pad = (-n) % group_size
+    if pad:
+        nan_pad = np.full(pad, np.nan, dtype=np.float64)
+        angles = np.concatenate([angles, nan_pad])
+        elbow_y = np.concatenate([elbow_y, nan_pad])
+        shoulder_y = np.concatenate([shoulder_y, nan_pad])
+    angle_blocks = angles.reshape(-1, group_size)
+    elbow_blocks = elbow_y.reshape(-1, group_size)
+    shoulder_blocks = shoulder_y.reshape(-1, group_size)
+
+    if _eval_kernels.HAVE_NUMBA:
+        # Jitted kernel: the whole per-shot numeric pass runs compiled.
+        avg_angles, undetected, bad_angles, posture_flags, scores = _eval_kernels.score_kernel(
+            angle_blocks, elbow_blocks, shoulder_blocks
+        )
+    else:
+        valid_counts = np.sum(~np.isnan(angle_blocks), axis=1)
+        angle_sums = np.nansum(angle_blocks, axis=1)
+        avg_angles = np.where(valid_counts > 0, angle_sums / np.maximum(valid_counts, 1), np.nan)
+        undetected = valid_counts == 0
+        # heuristics: ideal angle depends on shot type; for demo assume 45-80 is good
+        bad_angles = ~undetected & ((avg_angles < 30) | (avg_angles > 110))
+        # elbow too high (y smaller is higher in image coords); NaN comparisons are False.
+        elevation = shoulder_blocks - elbow_blocks
+        posture_flags = (elevation > 30).any(axis=1)
+        scores = np.maximum(
+            100.0 - 30.0 * undetected - 20.0 * bad_angles - 10.0 * posture_flags, 0.0
+        )
+
+    # Only the flagged shots pay for string construction.
+    shots = []
+    for shot_id in range(len(scores)):
+        block = detections[shot_id * group_size:(shot_id + 1) * group_size]
         issues = []
         suggestions = []
-        score = 100.0
-        if np.isnan(avg_angle):
+        if undetected[shot_id]:
             issues.append('Racket angle undetected in this sequence')
-            score -= 30
-        else:
-            # heuristics: ideal angle depends on shot type; for demo assume 45-80 is good
-            if avg_angle < 30 or avg_angle > 110:
-                issues.append(f'Racket angle ({avg_angle:.1f}°) might be suboptimal')
-                score -= 20
-                suggestions.append('Experiment with a more open racket face around 45°–80° at contact')
-        # posture heuristic (if keypoints exist)
-        posture_issues = False
-        for d in block:
-            k = d.get('keypoints') or {}
-            if k.get('left_elbow') and k.get('left_shoulder'):
-                ex = k['left_elbow'][1]
-                sx = k['left_shoulder'][1]
-                if ex < sx - 30:  # elbow too high (y smaller is higher in image coords)
-                    posture_issues = True
-        if posture_issues:
+        elif bad_angles[shot_id]:
+            issues.append(f'Racket angle ({avg_angles[shot_id]:.1f}°) might be suboptimal')
+            suggestions.append('Experiment with a more open racket face around 45°–80° at contact')
+        if posture_flags[shot_id]:
             issues.append('Elbow appears high for some frames (may reduce control)')
-            score -= 10
             suggestions.append('Work on shoulder-elbow-wrist alignment drills')
         shots.append({
-            'shot_id': i//group_size,
-            'score': max(score, 0),
+            'shot_id': shot_id,
+            'score': float(scores[shot_id]),
             'issues': issues,
             'suggestions': suggestions,
-            'avg_angle': float(avg_angle) if not np.isnan(avg_angle) else None,
+            'avg_angle': float(avg_angles[shot_id]) if not undetected[shot_id] else None,
             'frames': [d['frame_index'] for d in block]
         })
     return shots
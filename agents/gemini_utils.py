@@ -6,17 +6,37 @@ Shared helpers for configuring Gemini models and parsing responses.
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
-from typing import Any, Dict, Optional
+import re
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 try:  # pragma: no cover
     import google.generativeai as genai
 except ImportError:  # pragma: no cover
     genai = None
 
+try:  # pragma: no cover
+    from google import genai as genai_client
+except ImportError:  # pragma: no cover
+    genai_client = None
+
 MODEL_ENV = "COACH_MODEL_NAME"
 DEFAULT_MODEL = "gemini-2.5-flash-lite"
+BATCH_POLL_SECONDS = 15.0
+_TERMINAL_BATCH_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
 
 
 def _require_api_key() -> str:
@@ -26,29 +46,145 @@ def _require_api_key() -> str:
     return key
 
 
-def create_model(*, tools: Optional[list] = None, function_call_mode: str = "NONE"):
+class CoalescingModel:
+    """
+    Single-flight wrapper around a GenerativeModel: concurrent callers with a
+    byte-identical prompt share one API call (and one billing event). The first
+    caller fires the request; the rest block on the same Future. Keys are
+    SHA-256 of the prompt, and entries are dropped as soon as the call settles
+    so this never acts as a response cache.
+    """
+
+    def __init__(self, model) -> None:
+        self._model = model
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        if not isinstance(prompt, str):
+            # Multi-part payloads (images etc.) are not coalesced.
+            return self._model.generate_content(prompt)
+        key = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is None:
+                self._inflight[key] = Future()
+        if existing is not None:
+            return existing.result()
+        future = self._inflight[key]
+        try:
+            response = self._model.generate_content(prompt)
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+_CONFIGURE_LOCK = threading.Lock()
+_CONFIGURED = False
+
+
+def _configure_once() -> None:
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
+    with _CONFIGURE_LOCK:
+        if not _CONFIGURED:
+            genai.configure(api_key=_require_api_key())
+            _CONFIGURED = True
+
+
+def _construct_model(
+    model_name: str,
+    tools: tuple,
+    function_call_mode: str,
+    max_output_tokens: Optional[int],
+):
+    generation_config = {}
+    if max_output_tokens is not None:
+        generation_config["max_output_tokens"] = max_output_tokens
+    model = genai.GenerativeModel(
+        model_name=model_name,
+        tools=list(tools),
+        tool_config={"function_calling_config": {"mode": function_call_mode}},
+        generation_config=generation_config,
+    )
+    return CoalescingModel(model)
+
+
+_build_model = lru_cache(maxsize=8)(_construct_model)
+
+
+def create_model(
+    *,
+    tools: Optional[list] = None,
+    function_call_mode: str = "NONE",
+    model_name: Optional[str] = None,
+    max_output_tokens: Optional[int] = None,
+):
     """
     Configure and return a GenerativeModel instance with consistent defaults.
+
+    Configuration runs once per process and models are memoized by
+    (model_name, tools, mode, output cap), so repeated calls reuse the same
+    instance and its underlying HTTP connection pool instead of rebuilding
+    both per stage. Unhashable tool schemas (plain dicts) skip the memo and
+    construct a fresh model each call. model_name overrides the
+    environment-based default, which lets callers route easy tasks to a
+    cheaper tier.
     """
     if genai is None:
         raise RuntimeError("google-generativeai package is not installed.")
-    key = _require_api_key()
-    genai.configure(api_key=key)
+    _configure_once()
+    if model_name is None:
+        model_name = os.getenv(MODEL_ENV, DEFAULT_MODEL)
+    try:
+        return _build_model(model_name, tuple(tools or ()), function_call_mode, max_output_tokens)
+    except TypeError:
+        # Dict-form function declarations (the standard Gemini tool schema)
+        # are unhashable and can't key the cache; build uncached instead.
+        return _construct_model(model_name, tuple(tools or ()), function_call_mode, max_output_tokens)
+
+
+def submit_batch(prompts: List[str], *, display_name: str = "coach-batch") -> List[Any]:
+    """
+    Submit prompts through the Gemini Batch API and return one response per prompt.
+
+    Batched requests are billed at half the interactive token rate and share a
+    single round-trip, so this is the preferred path for offline workloads that
+    fan out many independent prompts. Responses come back in input order and can
+    be fed straight into response_to_json().
+    """
+    if genai_client is None:
+        raise RuntimeError("google-genai package is not installed; batch mode unavailable.")
+    client = genai_client.Client(api_key=_require_api_key())
     model_name = os.getenv(MODEL_ENV, DEFAULT_MODEL)
-    return genai.GenerativeModel(
-        model_name=model_name,
-        tools=tools or [],
-        tool_config={"function_calling_config": {"mode": function_call_mode}},
-    )
+    src = [{"contents": [{"role": "user", "parts": [{"text": prompt}]}]} for prompt in prompts]
+    job = client.batches.create(model=model_name, src=src, config={"display_name": display_name})
+    while job.state.name not in _TERMINAL_BATCH_STATES:
+        time.sleep(BATCH_POLL_SECONDS)
+        job = client.batches.get(name=job.name)
+    if job.state.name != "JOB_STATE_SUCCEEDED":
+        raise RuntimeError(f"Gemini batch job ended in state {job.state.name}.")
+    return [entry.response for entry in job.dest.inlined_responses]
+
+
+_FENCE_RE = re.compile(r"^\s*```(?:\w+)?\s*\n(.*?)\n?```\s*$", re.DOTALL)
 
 
 def _strip_fence(text: str) -> str:
-    stripped = text.strip()
-    if stripped.startswith("```"):
-        stripped = stripped.split("\n", 1)[1]
-        if "```" in stripped:
-            stripped = stripped.rsplit("```", 1)[0]
-    return stripped.strip()
+    match = _FENCE_RE.match(text)
+    if match:
+        return match.group(1).strip()
+    return text.strip()
 
 
 def extract_text(response: Any) -> str:
@@ -94,7 +230,7 @@ def response_to_json(response: Any) -> Dict[str, Any]:
     text = extract_text(response)
     text = _strip_fence(text)
     try:
-        return json.loads(text)
-    except json.JSONDecodeError as exc:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError as exc:
         raise RuntimeError(f"Gemini response was not valid JSON: {text}") from exc
 
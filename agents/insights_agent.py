@@ -6,12 +6,15 @@ LLM agent that iteratively refines diagnostic hypotheses before coaching.
 
 from __future__ import annotations
 
-import json
 from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
+
+from agents._prompt_compact import compact_evals
 from agents.gemini_utils import create_model, response_to_json
 
 MAX_ATTEMPTS = 3
+EVAL_TOKEN_BUDGET = 2000
 
 INSIGHTS_INSTRUCTIONS = """
 You are a table-tennis diagnostics specialist. Produce JSON only—no markdown.
@@ -27,6 +30,79 @@ Rules:
 - If you fail to follow the schema, the supervisor will resend your previous answer with a correction—fix it.
 """
 
+SCHEMA_GUIDE = """
+Field-by-field guidance:
+- hypothesis: the single most likely root cause behind the player's scoring
+  pattern, stated as a falsifiable claim (e.g. "a closed racket face on the
+  forehand is the primary driver of the low push scores"). Do not list several
+  unrelated causes; pick the dominant one and let evidence carry the nuance.
+- evidence: 2-5 bullets, each citing a concrete number or issue string from the
+  data after the --- separator: a score, an angle, an issue count from
+  tool_context.technique_breakdown, or a drill match from drill_lookup.
+- confidence: how well the evidence converges on the hypothesis. Use 0.8-1.0
+  only when multiple independent signals agree; 0.4-0.7 when signals are mixed
+  or sparse; below 0.4 when the detections were mostly empty.
+
+Worked example (illustrative only — your content must come from the data after
+the separator):
+{
+  "hypothesis": "An overly closed racket face at contact, compounded by a high elbow, is the main cause of the sub-70 shot scores.",
+  "evidence": [
+    "technique_breakdown reports an average score of 62.5 across 6 shots with a worst of 40",
+    "'Racket angle (118.0°) might be suboptimal' appears on 4 of 6 shots",
+    "'Elbow appears high for some frames (may reduce control)' was flagged twice, consistent with a closed-face compensation"
+  ],
+  "confidence": 0.8
+}
+"""
+
+# Static prefix sent byte-identical on every call so Gemini's implicit context
+# cache can hit (the cache requires a >=1024-token shared prefix). Per-session
+# data is appended after the separator.
+PROMPT_PREFIX = INSIGHTS_INSTRUCTIONS.strip() + "\n" + SCHEMA_GUIDE.strip()
+PROMPT_SEPARATOR = "\n---\n"
+FEEDBACK_SEPARATOR = "\n---FEEDBACK---\n"
+
+# Sorted keys keep the serialized payload byte-stable across runs so identical
+# sessions (and every retry sharing the same base) hit the same cached prefix.
+# Compact output (no indentation): whitespace is billed like any other token.
+_PAYLOAD_OPTS = orjson.OPT_SORT_KEYS
+
+# Header concatenated once at import; call sites only serialize the suffix.
+_PROMPT_HEADER = PROMPT_PREFIX + PROMPT_SEPARATOR
+
+
+def _base_payload(
+    evaluations: List[Dict[str, Any]],
+    tool_context: Dict[str, Any],
+    user_profile: Dict[str, Any],
+) -> Dict[str, Any]:
+    return {
+        "user_profile": user_profile,
+        "evaluation_samples": compact_evals(evaluations, max_tokens=EVAL_TOKEN_BUDGET),
+        "tool_context": tool_context,
+    }
+
+
+def build_prompt(
+    evaluations: List[Dict[str, Any]],
+    *,
+    tool_context: Dict[str, Any],
+    user_profile: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Build the diagnostics prompt; shared by the retry loop and batch mode."""
+    payload = _base_payload(evaluations, tool_context, user_profile or {})
+    return _PROMPT_HEADER + orjson.dumps(payload, option=_PAYLOAD_OPTS).decode()
+
+
+def finalize(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a single-shot response (no retry budget, e.g. batch mode)."""
+    ok, reason = _validate(parsed)
+    parsed["llm_used"] = True
+    if not ok:
+        parsed["validation_error"] = reason
+    return parsed
+
 
 def generate_insights(
     evaluations: List[Dict[str, Any]],
@@ -38,13 +114,9 @@ def generate_insights(
     Run a bounded self-critique loop to produce consistent diagnostic insights.
     """
     user_profile = user_profile or {}
-    base_payload = {
-        "system_rules": INSIGHTS_INSTRUCTIONS.strip(),
-        "user_profile": user_profile,
-        "evaluation_samples": evaluations[:10],
-        "tool_context": tool_context,
-    }
-    prompt = json.dumps(base_payload, indent=2)
+    base_payload = _base_payload(evaluations, tool_context, user_profile)
+    base_prompt = _PROMPT_HEADER + orjson.dumps(base_payload, option=_PAYLOAD_OPTS).decode()
+    prompt = base_prompt
     model = create_model()
 
     last_response: Optional[Dict[str, Any]] = None
@@ -55,13 +127,56 @@ def generate_insights(
         if ok:
             parsed["llm_used"] = True
             return parsed
-        # feed back the issue and try again
-        feedback = {
-            "feedback": f"Attempt {attempt + 1} was invalid: {reason}",
-            "previous_response": parsed,
-        }
-        prompt = json.dumps({**base_payload, **feedback}, indent=2)
+        prompt = _retry_prompt(base_prompt, attempt, reason, parsed)
+        last_response = parsed
+    return _exhausted(last_response)
+
+
+async def generate_insights_async(
+    evaluations: List[Dict[str, Any]],
+    *,
+    tool_context: Dict[str, Any],
+    user_profile: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Async mirror of generate_insights; lets an event loop service many
+    in-flight Gemini calls concurrently (e.g. asyncio.gather across sessions).
+    """
+    user_profile = user_profile or {}
+    base_payload = _base_payload(evaluations, tool_context, user_profile)
+    base_prompt = _PROMPT_HEADER + orjson.dumps(base_payload, option=_PAYLOAD_OPTS).decode()
+    prompt = base_prompt
+    model = create_model()
+
+    last_response: Optional[Dict[str, Any]] = None
+    for attempt in range(MAX_ATTEMPTS):
+        response = await model.generate_content_async(prompt)
+        parsed = response_to_json(response)
+        ok, reason = _validate(parsed)
+        if ok:
+            parsed["llm_used"] = True
+            return parsed
         last_response = parsed
+        prompt = _retry_prompt(base_prompt, attempt, reason, parsed)
+    return _exhausted(last_response)
+
+
+def _retry_prompt(
+    base_prompt: str,
+    attempt: int,
+    reason: str,
+    parsed: Dict[str, Any],
+) -> str:
+    # Feed back the issue and try again, appending after the invariant base so
+    # every retry shares attempt 1's byte prefix.
+    feedback = {
+        "feedback": f"Attempt {attempt + 1} was invalid: {reason}",
+        "previous_response": parsed,
+    }
+    return base_prompt + FEEDBACK_SEPARATOR + orjson.dumps(feedback, option=_PAYLOAD_OPTS).decode()
+
+
+def _exhausted(last_response: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     # If still invalid, return the last attempt for transparency
     final = last_response or {"hypothesis": "", "evidence": [], "confidence": 0.0}
     final["llm_used"] = True
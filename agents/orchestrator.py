@@ -7,14 +7,26 @@ and pause/resume semantics.
 
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, List, Tuple
 
+import orjson
+
+try:  # pragma: no cover
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+from agents import coach_agent, insights_agent
 from agents.vision_agent import analyze_video
 from agents.eval_agent import score_shots
-from agents.insights_agent import generate_insights
-from agents.coach_agent import generate_coaching_plan
+from agents.gemini_utils import response_to_json, submit_batch
+from agents.insights_agent import generate_insights, generate_insights_async
+from agents.coach_agent import generate_coaching_plan, generate_coaching_plan_async
 from agents.tool_registry import ToolRegistry
 from services.session_service import InMemorySessionService, SessionRecord
 from utils.observability import log_event, timed_span
@@ -22,6 +34,14 @@ from utils.observability import log_event, timed_span
 TOOL_REGISTRY = ToolRegistry()
 
 
+def _log_cache_write_failure(future, cache: str, session_id: str) -> None:
+    # Cache writes are fire-and-forget; without this callback a failure
+    # (disk full, unserializable stage output) would vanish with the future.
+    exc = future.exception()
+    if exc is not None:
+        log_event("cache_write_failed", cache=cache, session_id=session_id, error=repr(exc))
+
+
 class AgentOrchestrator:
     def __init__(
         self,
@@ -32,6 +52,12 @@ class AgentOrchestrator:
         self.session_service = session_service
         self.cache_root = Path(cache_root)
         self.cache_root.mkdir(parents=True, exist_ok=True)
+        # Stage results are handed to a small writer pool so compute never
+        # blocks on disk; os.replace keeps each cache file atomic. The exit
+        # hook drains pending writes so a short-lived process can't quit
+        # between submit and write.
+        self._cache_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-write")
+        atexit.register(self._cache_writer.shutdown, wait=True)
 
     def run(
         self,
@@ -40,6 +66,140 @@ class AgentOrchestrator:
         *,
         resume: bool = False,
     ) -> Dict[str, Any]:
+        session_id = session.session_id
+        detections, evaluations, tool_context = self._prepare_stages(video_path, session, resume)
+        with timed_span("insights", session_id=session_id):
+            diagnostics = generate_insights(
+                evaluations,
+                tool_context=tool_context,
+                user_profile=session.user_profile,
+            )
+        with timed_span("coaching", session_id=session_id):
+            plan = generate_coaching_plan(
+                evaluations,
+                tool_context=tool_context,
+                insights=diagnostics,
+                user_profile=session.user_profile,
+            )
+        return self._finalize(session_id, detections, evaluations, diagnostics, plan)
+
+    async def run_async(
+        self,
+        video_path: str,
+        session: SessionRecord,
+        *,
+        resume: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of run: vision/evaluation stay on a worker thread, the
+        Gemini calls use the SDK's async client. Combine across sessions with
+        asyncio.gather to keep many API calls in flight from one event loop.
+        """
+        session_id = session.session_id
+        detections, evaluations, tool_context = await asyncio.to_thread(
+            self._prepare_stages, video_path, session, resume
+        )
+        with timed_span("insights", session_id=session_id):
+            diagnostics = await generate_insights_async(
+                evaluations,
+                tool_context=tool_context,
+                user_profile=session.user_profile,
+            )
+        with timed_span("coaching", session_id=session_id):
+            plan = await generate_coaching_plan_async(
+                evaluations,
+                tool_context=tool_context,
+                insights=diagnostics,
+                user_profile=session.user_profile,
+            )
+        return self._finalize(session_id, detections, evaluations, diagnostics, plan)
+
+    async def run_many_async(
+        self,
+        jobs: List[Tuple[str, SessionRecord]],
+        *,
+        resume: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Run several sessions concurrently on one event loop."""
+        return list(
+            await asyncio.gather(
+                *(self.run_async(video, session, resume=resume) for video, session in jobs)
+            )
+        )
+
+    def run_batch(
+        self,
+        jobs: List[Tuple[str, SessionRecord]],
+        *,
+        resume: bool = False,
+        max_workers: int = 4,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the pipeline for several (video_path, session) jobs, routing all
+        Gemini calls through the Batch API.
+
+        Vision and evaluation stages run concurrently in a thread pool; the
+        insights prompts for every session are then submitted as one batch,
+        followed by a second batch of coaching prompts built on those results.
+        Batched tokens are billed at half the interactive rate and the HTTP
+        round-trip is amortized across the whole cohort. Insights validation is
+        single-shot here (no retry loop); invalid payloads are annotated the
+        same way the interactive path annotates an exhausted retry budget.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            prepared = list(
+                pool.map(
+                    lambda job: self._prepare_stages(job[0], job[1], resume),
+                    jobs,
+                )
+            )
+
+        insights_prompts = [
+            insights_agent.build_prompt(
+                evaluations,
+                tool_context=tool_context,
+                user_profile=session.user_profile,
+            )
+            for (_, session), (_, evaluations, tool_context) in zip(jobs, prepared)
+        ]
+        with timed_span("insights_batch", session_id=None, sessions=len(jobs)):
+            insights_responses = submit_batch(insights_prompts, display_name="coach-insights")
+        diagnostics_list = [
+            insights_agent.finalize(response_to_json(response))
+            for response in insights_responses
+        ]
+
+        coach_prompts = [
+            coach_agent.build_prompt(
+                evaluations,
+                tool_context=tool_context,
+                insights=diagnostics,
+                user_profile=session.user_profile,
+            )
+            for (_, session), (_, evaluations, tool_context), diagnostics in zip(
+                jobs, prepared, diagnostics_list
+            )
+        ]
+        with timed_span("coaching_batch", session_id=None, sessions=len(jobs)):
+            coach_responses = submit_batch(coach_prompts, display_name="coach-plans")
+
+        results = []
+        for (_, session), (detections, evaluations, _), diagnostics, response in zip(
+            jobs, prepared, diagnostics_list, coach_responses
+        ):
+            plan = response_to_json(response)
+            plan["llm_used"] = True
+            results.append(
+                self._finalize(session.session_id, detections, evaluations, diagnostics, plan)
+            )
+        return results
+
+    def _prepare_stages(
+        self,
+        video_path: str,
+        session: SessionRecord,
+        resume: bool,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
         session_id = session.session_id
         cache_dir = self.cache_root / session_id
         cache_dir.mkdir(parents=True, exist_ok=True)
@@ -65,19 +225,16 @@ class AgentOrchestrator:
             evaluations=evaluations,
             user_profile=session.user_profile,
         )
-        with timed_span("insights", session_id=session_id):
-            diagnostics = generate_insights(
-                evaluations,
-                tool_context=tool_context,
-                user_profile=session.user_profile,
-            )
-        with timed_span("coaching", session_id=session_id):
-            plan = generate_coaching_plan(
-                evaluations,
-                tool_context=tool_context,
-                insights=diagnostics,
-                user_profile=session.user_profile,
-            )
+        return detections, evaluations, tool_context
+
+    def _finalize(
+        self,
+        session_id: str,
+        detections: List[Dict[str, Any]],
+        evaluations: List[Dict[str, Any]],
+        diagnostics: Dict[str, Any],
+        plan: Dict[str, Any],
+    ) -> Dict[str, Any]:
         log_event(
             "coaching_complete",
             session_id=session_id,
@@ -102,6 +259,30 @@ class AgentOrchestrator:
         log_event("pipeline_end", session_id=session_id)
         return result
 
+    def _write_cache(self, cache_path: Path, data: Any) -> None:
+        # MessagePack caches are smaller (no repeated key strings as text) and
+        # parse several times faster on resume; JSON remains the fallback so
+        # the caches stay readable without the optional dependency.
+        if msgpack is not None:
+            cache_path = cache_path.with_suffix(".msgpack")
+            payload = msgpack.packb(data, use_bin_type=True)
+        else:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, cache_path)
+
+    @staticmethod
+    def _read_cache(cache_path: Path):
+        """Return cached stage data, or None when no readable cache exists."""
+        msgpack_path = cache_path.with_suffix(".msgpack")
+        if msgpack is not None and msgpack_path.exists():
+            return msgpack.unpackb(msgpack_path.read_bytes(), raw=False)
+        if cache_path.exists():
+            # Caches written before the msgpack switch (or without it installed).
+            return orjson.loads(cache_path.read_bytes())
+        return None
+
     def _load_or_execute(
         self,
         cache_path: Path,
@@ -113,13 +294,17 @@ class AgentOrchestrator:
         summary_fields: Dict[str, Any] | None = None,
     ):
         summary_fields = summary_fields or {}
-        if resume and cache_path.exists():
-            data = json.loads(cache_path.read_text(encoding="utf-8"))
-            log_event("stage_resume", stage=stage, session_id=session_id, cache=str(cache_path))
-            return data
+        if resume:
+            data = self._read_cache(cache_path)
+            if data is not None:
+                log_event("stage_resume", stage=stage, session_id=session_id, cache=str(cache_path))
+                return data
         with timed_span(stage, session_id=session_id, **summary_fields):
             data = fn()
-        cache_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        future = self._cache_writer.submit(self._write_cache, cache_path, data)
+        future.add_done_callback(
+            lambda f, cache=str(cache_path), sid=session_id: _log_cache_write_failure(f, cache, sid)
+        )
         self.session_service.append_event(
             session_id,
             f"{stage}_complete",
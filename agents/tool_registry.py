@@ -8,9 +8,14 @@ over structured insights and domain knowledge.
 
 from __future__ import annotations
 
+from collections import Counter
 from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import chain
 from typing import Any, Dict, List, Optional
-import statistics
+import math
+
+from utils.keyword_matcher import KeywordMatcher
 
 
 class BaseTool:
@@ -31,23 +36,43 @@ class TechniqueBreakdownTool(BaseTool):
 
     def run(self, *, evaluations: Optional[List[Dict[str, Any]]] = None, **_) -> Dict[str, Any]:
         evaluations = evaluations or []
-        scores = [e.get("score") for e in evaluations if isinstance(e.get("score"), (int, float))]
+        # Single pass: count, sum, sum of squares, min, and max together,
+        # instead of statistics.mean/pstdev plus max/min re-walking the list.
+        count = 0
+        total = 0.0
+        total_sq = 0.0
+        best = None
+        worst = None
+        issue_counts: Counter = Counter()
+        frames_total = 0
+        for evaluation in evaluations:
+            issue_counts.update(evaluation.get("issues", ()))
+            frames_total += len(evaluation.get("frames", ()))
+            score = evaluation.get("score")
+            if not isinstance(score, (int, float)):
+                continue
+            count += 1
+            total += score
+            total_sq += score * score
+            if best is None or score > best:
+                best = score
+            if worst is None or score < worst:
+                worst = score
+        mean = total / count if count else None
         score_summary = {
-            "count": len(scores),
-            "average": round(statistics.mean(scores), 2) if scores else None,
-            "stdev": round(statistics.pstdev(scores), 2) if len(scores) > 1 else None,
-            "best": max(scores) if scores else None,
-            "worst": min(scores) if scores else None,
+            "count": count,
+            "average": round(mean, 2) if count else None,
+            # population stdev via sqrt(E[x^2] - E[x]^2); clamp for rounding error
+            "stdev": round(math.sqrt(max(total_sq / count - mean * mean, 0.0)), 2) if count > 1 else None,
+            "best": best,
+            "worst": worst,
         }
-        issue_counts: Dict[str, int] = {}
-        for evaluation in evaluations:
-            for issue in evaluation.get("issues", []):
-                issue_counts[issue] = issue_counts.get(issue, 0) + 1
-        top_issues = sorted(issue_counts.items(), key=lambda kv: kv[1], reverse=True)
+        # Heap-based top-K: only the displayed issues are worth sorting.
+        top_issues = issue_counts.most_common(10)
         return {
             "score_summary": score_summary,
             "top_issues": [{"issue": issue, "count": count} for issue, count in top_issues],
-            "frames_analyzed": sum(len(e.get("frames", [])) for e in evaluations),
+            "frames_analyzed": frames_total,
         }
 
 class DrillLookupTool(BaseTool):
@@ -75,20 +100,41 @@ class DrillLookupTool(BaseTool):
         },
     ]
 
+    # One automaton matches every library keyword in a single pass over the
+    # issue text, instead of a per-drill `keyword in issue` scan.
+    _MATCHER: Optional[KeywordMatcher] = None
+
+    @classmethod
+    def _keyword_matcher(cls) -> KeywordMatcher:
+        if cls._MATCHER is None:
+            matcher = KeywordMatcher()
+            for index, drill in enumerate(cls._DRILL_LIBRARY):
+                for keyword in drill["keywords"]:
+                    matcher.add_word(keyword.lower(), index)
+            cls._MATCHER = matcher.build()
+        return cls._MATCHER
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _match_indices(issue_lower: str) -> tuple:
+        # The library is class-level-immutable, so memoizing by issue text is
+        # safe; recurring issues across a session skip the automaton pass.
+        # skill_level is only echoed into the response, so it's not key material.
+        matcher = DrillLookupTool._keyword_matcher()
+        return tuple(sorted(set(matcher.iter_matches(issue_lower))))
+
     def run(
         self,
         *,
         issue: str,
         skill_level: Optional[str] = None,
+        issue_lower: Optional[str] = None,
         **_,
     ) -> Dict[str, Any]:
         skill_level = (skill_level or "intermediate").lower()
-        issue_lower = issue.lower()
-        matches = [
-            drill
-            for drill in self._DRILL_LIBRARY
-            if any(keyword in issue_lower for keyword in drill["keywords"])
-        ]
+        # issue_lower lets gather_context normalize each issue once and share
+        # the result across lookups instead of re-lowering per call.
+        matches = [self._DRILL_LIBRARY[index] for index in self._match_indices(issue_lower or issue.lower())]
         if not matches:
             matches = [
                 {
@@ -99,6 +145,10 @@ class DrillLookupTool(BaseTool):
             ]
         return {"issue": issue, "skill_level": skill_level, "drills": matches}
 
+# Build the automaton (and lowercase the keywords) once at import instead of
+# on the first lookup of the first request.
+DrillLookupTool._keyword_matcher()
+
 @dataclass
 class ToolRegistry:
     tools: List[BaseTool] = field(default_factory=list)
@@ -109,12 +159,15 @@ class ToolRegistry:
                 TechniqueBreakdownTool(),
                 DrillLookupTool(),
             ]
+        # Name index built once: invoke becomes a single hash probe instead of
+        # a list scan per call (function-calling loops hit this repeatedly).
+        self._by_name = {tool.name: tool for tool in self.tools}
 
     def invoke(self, name: str, **kwargs) -> Dict[str, Any]:
-        for tool in self.tools:
-            if tool.name == name:
-                return tool.run(**kwargs)
-        raise ValueError(f"Tool '{name}' not registered.")
+        tool = self._by_name.get(name)
+        if tool is None:
+            raise ValueError(f"Tool '{name}' not registered.")
+        return tool.run(**kwargs)
 
     def gather_context(
         self,
@@ -126,6 +179,9 @@ class ToolRegistry:
         evaluations = evaluations or []
         user_profile = user_profile or {}
         issue_keywords = self._collect_issues(evaluations)
+        # Normalize each issue once here so every tool shares the lowercased
+        # form instead of re-deriving it per invocation.
+        normalized_issues = [(issue, issue.lower()) for issue in issue_keywords]
         context: Dict[str, Any] = {}
         for tool in self.tools:
             tool_kwargs = {
@@ -136,8 +192,14 @@ class ToolRegistry:
             if isinstance(tool, DrillLookupTool):
                 # Run once per top issue to mimic tool calls and collect references.
                 drill_entries = []
-                for issue in issue_keywords[:3] or ["overall technique"]:
-                    drill_entries.append(tool.run(issue=issue, skill_level=user_profile.get("level")))
+                for issue, issue_lower in normalized_issues[:3] or [("overall technique", "overall technique")]:
+                    drill_entries.append(
+                        tool.run(
+                            issue=issue,
+                            skill_level=user_profile.get("level"),
+                            issue_lower=issue_lower,
+                        )
+                    )
                 context[tool.name] = drill_entries
             else:
                 context[tool.name] = tool.run(evaluations=evaluations, user_profile=user_profile)
@@ -145,15 +207,7 @@ class ToolRegistry:
 
     @staticmethod
     def _collect_issues(evaluations: List[Dict[str, Any]]) -> List[str]:
-        issues: List[str] = []
-        for evaluation in evaluations:
-            issues.extend(evaluation.get("issues", []))
-        # de-duplicate while preserving order
-        seen = set()
-        unique = []
-        for issue in issues:
-            if issue not in seen:
-                seen.add(issue)
-                unique.append(issue)
-        return unique
+        # dict.fromkeys de-duplicates in one pass while preserving order.
+        all_issues = chain.from_iterable(e.get("issues", ()) for e in evaluations)
+        return list(dict.fromkeys(all_issues))
 
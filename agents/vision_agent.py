@@ -6,58 +6,159 @@ Uses OpenCV and Mediapipe (if available). Also exposes a high-level analyze_vide
 function that returns structured detections per frame.
 """
 
-import cv2
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from tools.video_tools import extract_frames
-try:
-    import mediapipe as mp
-    USE_MEDIAPIPE = True
-except Exception:
-    USE_MEDIAPIPE = False
+from tools.video_tools import (
+    batch_estimate_line_angles,
+    estimate_line_angle_near_point,
+    extract_frame_stack,
+    iter_frames,
+)
+
+# Per-thread Pose instances: graph construction is expensive so each thread
+# builds one lazily and reuses it, but MediaPipe solution objects are not
+# thread-safe (process() mutates graph timestamps and output state) and the
+# video mode (static_image_mode=False) carries ROI tracking state between
+# frames — so batch/async drivers that analyze several videos concurrently
+# must never share an instance. mediapipe itself is imported lazily here: it
+# dominates cold import time and callers that never touch video (e.g.
+# evaluate --mock) shouldn't pay for it.
+_POSE_TLS = threading.local()
+_POSE_LOCK = threading.Lock()
+_POSE_UNAVAILABLE = False
+_POSE_INSTANCES = []
+
+
+def _close_pose_instances():
+    with _POSE_LOCK:
+        for pose in _POSE_INSTANCES:
+            pose.close()
+        _POSE_INSTANCES.clear()
+
+
+def _get_pose():
+    global _POSE_UNAVAILABLE
+    if _POSE_UNAVAILABLE:
+        return None
+    pose = getattr(_POSE_TLS, 'pose', None)
+    if pose is None:
+        try:
+            import mediapipe as mp
+        except Exception:
+            _POSE_UNAVAILABLE = True
+            return None
+        # Lite model (complexity 0) + tracking mode: detection runs once and
+        # successive frames only pay the cheap tracker, which is plenty for
+        # the coarse wrist/elbow/shoulder points we use.
+        # POSE_MODEL_COMPLEXITY=1/2 restores the heavier models.
+        complexity = int(os.getenv('POSE_MODEL_COMPLEXITY', '0'))
+        pose = mp.solutions.pose.Pose(
+            static_image_mode=False,
+            model_complexity=complexity,
+        )
+        _POSE_TLS.pose = pose
+        with _POSE_LOCK:
+            if not _POSE_INSTANCES:
+                atexit.register(_close_pose_instances)
+            _POSE_INSTANCES.append(pose)
+    return pose
+
+# Landmark indices of interest (mediapipe Pose numbering) and their names,
+# kept in lockstep so extraction can be vectorized.
+_LANDMARK_IDX = (11, 12, 13, 14, 15, 16, 23, 24)
+_LANDMARK_NAMES = (
+    'left_shoulder', 'right_shoulder',
+    'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist',
+    'left_hip', 'right_hip',
+)
+
+def _frame_detection(index, ts, img, pose):
+    """Run pose detection on one frame and return its detection dict (no racket angle yet)."""
+    h, w = img.shape[:2]
+    detection = {'frame_index': index, 'timestamp': ts, 'racket_angle': None, 'keypoints': {}}
+    if pose:
+        # channel-reversed view + one contiguous copy is cheaper than
+        # cv2.cvtColor's full-frame transform (memory-bound at HD sizes)
+        img_rgb = np.ascontiguousarray(img[..., ::-1])
+        res = pose.process(img_rgb)
+        if res.pose_landmarks:
+            landmarks = res.pose_landmarks.landmark
+            # pull the landmarks of interest into one array and let
+            # NumPy scale to pixel coords in a single C-level op
+            pts = np.array(
+                [(landmarks[i].x, landmarks[i].y) for i in _LANDMARK_IDX],
+                dtype=np.float64,
+            )
+            pts *= (w, h)
+            detection['keypoints'] = dict(zip(_LANDMARK_NAMES, map(tuple, pts.tolist())))
+    return detection
+
+def iter_video_detections(video_path, max_frames=300, frame_stride=3):
+    """Streaming variant of analyze_video: yield one detection dict per frame.
+
+    Frames come from iter_frames so at most one decoded frame is alive at a
+    time — memory stays flat however long the clip is. The trade-off is that
+    the racket-angle stage runs inline per frame instead of fanning out to the
+    thread pool; use analyze_video when the whole clip fits in memory.
+    """
+    pose = _get_pose()
+    for i, (ts, img) in enumerate(iter_frames(video_path, max_frames=max_frames, frame_stride=frame_stride)):
+        detection = _frame_detection(i, ts, img, pose)
+        detection['racket_angle'] = _racket_angle_or_none(img, detection['keypoints'])
+        yield detection
 
 def analyze_video(video_path, max_frames=300, frame_stride=3):
     """Extract frames and compute simple keypoints and racket angle proxies.
     Returns a list of dicts: [{'frame_index': int, 'keypoints': {...}, 'racket_angle': float, 'timestamp': float}, ...]
     """
-    frames = extract_frames(video_path, max_frames=max_frames, frame_stride=frame_stride)
+    # One contiguous frame stack: a single allocation instead of one ndarray
+    # per sampled frame, and both passes below iterate views into it.
+    timestamps, frames = extract_frame_stack(video_path, max_frames=max_frames, frame_stride=frame_stride)
     results = []
-    pose = None
-    if USE_MEDIAPIPE:
-        mp_pose = mp.solutions.pose
-        pose = mp_pose.Pose(static_image_mode=True)
-    try:
-        for i, (ts, img) in enumerate(frames):
-            h, w = img.shape[:2]
-            detection = {'frame_index': i, 'timestamp': ts, 'racket_angle': None, 'keypoints': {}}
-            if pose:
-                img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                res = pose.process(img_rgb)
-                if res.pose_landmarks:
-                    landmarks = res.pose_landmarks.landmark
-                    # extract a few landmarks by name indices if available
-                    detection['keypoints'] = {
-                        'left_shoulder': (landmarks[11].x * w, landmarks[11].y * h),
-                        'right_shoulder': (landmarks[12].x * w, landmarks[12].y * h),
-                        'left_elbow': (landmarks[13].x * w, landmarks[13].y * h),
-                        'right_elbow': (landmarks[14].x * w, landmarks[14].y * h),
-                        'left_wrist': (landmarks[15].x * w, landmarks[15].y * h),
-                        'right_wrist': (landmarks[16].x * w, landmarks[16].y * h),
-                        'left_hip': (landmarks[23].x * w, landmarks[23].y * h),
-                        'right_hip': (landmarks[24].x * w, landmarks[24].y * h),
-                    }
-            # Racket angle proxy: detect largest edge direction in near-wrist area (simple heuristic)
-            racket_angle = None
-            try:
-                racket_angle = compute_racket_angle(img, detection.get('keypoints', {}))
-            except Exception:
-                racket_angle = None
+    pose = _get_pose()
+    for i in range(len(frames)):
+        results.append(_frame_detection(i, float(timestamps[i]), frames[i], pose))
+    # Racket angle proxy: detect largest edge direction in near-wrist area
+    # (simple heuristic). Pose must stay sequential for ROI tracking, but the
+    # OpenCV edge/line work releases the GIL, so contiguous frame chunks fan
+    # out to threads; within each chunk the batch estimator reuses one set of
+    # gray/edge scratch buffers instead of reallocating per frame.
+    if results:
+        wrists = [_wrist_point(detection['keypoints']) for detection in results]
+        workers = min(len(results), os.cpu_count() or 1)
+        chunk = -(-len(results) // workers)  # ceil division
+        starts = range(0, len(results), chunk)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            angle_chunks = pool.map(
+                lambda start: batch_estimate_line_angles(
+                    frames[start:start + chunk],
+                    wrists[start:start + chunk],
+                    search_radius=120,
+                ),
+                starts,
+            )
+        angles = [angle for chunk_angles in angle_chunks for angle in chunk_angles]
+        for detection, racket_angle in zip(results, angles):
             detection['racket_angle'] = racket_angle
-            results.append(detection)
-    finally:
-        if pose:
-            pose.close()
     return results
 
+def _wrist_point(keypoints):
+    return keypoints.get('right_wrist') or keypoints.get('left_wrist')
+
+def _racket_angle_or_none(img, keypoints):
+    # Explicit wrist check instead of paying an exception frame per frame;
+    # the only expected failure was compute_racket_angle's missing-wrist
+    # ValueError. compute_racket_angle stays for external callers.
+    wrist = _wrist_point(keypoints)
+    if wrist is None:
+        return None
+    return estimate_line_angle_near_point(img, wrist, search_radius=120)
+
 def compute_racket_angle(img, keypoints):
     """Simple heuristic: look near the wrist for long linear contours and estimate angle.
     Returns angle in degrees (0-180).
@@ -6,11 +6,12 @@ Local Gradio UI for the AI Table Tennis Coach workflow.
 
 from __future__ import annotations
 
-import json
 import os
 import tempfile
 from typing import Any, Dict, List
 
+import orjson
+
 import gradio as gr
 import pandas as pd
 
@@ -59,11 +60,10 @@ def _format_evidence(items: List[str]) -> str:
 def _build_dataframe(rows: List[Dict[str, Any]], columns: List[str]) -> pd.DataFrame:
     if not rows:
         return pd.DataFrame(columns=columns)
-    df = pd.DataFrame(rows)
-    missing = [col for col in columns if col not in df.columns]
-    for col in missing:
-        df[col] = ""
-    return df[columns]
+    # from_records with a declared column list selects and orders columns in
+    # one construction — no per-column insert loop or df[columns] reorder copy.
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    return df.fillna("")
 
 def analyze_file(video_path, session_id="", skill_level="Intermediate", goals="", resume=False):
     """Gradio callback that runs the multi-agent pipeline and returns structured output."""
@@ -73,8 +73,12 @@ def analyze_file(video_path, session_id="", skill_level="Intermediate", goals=""
     )
     out = ORCHESTRATOR.run(video_path, session, resume=resume)
     report_path = os.path.join(tempfile.gettempdir(), f"tt_report_{session.session_id}.json")
-    with open(report_path, "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2)
+    # Compact orjson bytes: one C-level pass over the report instead of
+    # json.dump's pretty-printer walking every per-frame detection. Set
+    # TT_REPORT_PRETTY=1 when a human needs to read the artifact.
+    opts = orjson.OPT_INDENT_2 if os.getenv("TT_REPORT_PRETTY") == "1" else 0
+    with open(report_path, "wb") as f:
+        f.write(orjson.dumps(out, option=opts))
 
     evaluations = out.get("evaluations", [])
     scores = [e.get("score") for e in evaluations if isinstance(e.get("score"), (int, float))]
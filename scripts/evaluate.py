@@ -9,14 +9,19 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, FrozenSet, List, Any, Tuple
 
-from agents.orchestrator import AgentOrchestrator
 from services.session_service import InMemorySessionService
 from utils.observability import setup_logging, log_event
 
+# AgentOrchestrator is imported lazily inside _worker_pipeline: it drags in
+# the whole vision stack (cv2/mediapipe/numpy), which --mock never needs.
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Evaluate the Table Tennis Coach agents.")
@@ -48,42 +53,76 @@ def collect_issues(evaluations: List[Dict[str, Any]]) -> List[str]:
     return issues
 
 
-def compute_metrics(predicted: List[str], expected: List[str]) -> Tuple[float, float, float]:
-    pred_set = set(predicted)
-    exp_set = set(expected)
-    true_positive = len(pred_set & exp_set)
-    precision = true_positive / len(pred_set) if pred_set else 0.0
-    recall = true_positive / len(exp_set) if exp_set else 0.0
+@lru_cache(maxsize=1024)
+def compute_metrics(predicted: FrozenSet[str], expected: FrozenSet[str]) -> Tuple[float, float, float]:
+    """Precision/recall/F1 over issue sets; memoized since manifest replays
+    keep producing the same predicted/expected pairs."""
+    true_positive = len(predicted & expected)
+    precision = true_positive / len(predicted) if predicted else 0.0
+    recall = true_positive / len(expected) if expected else 0.0
     f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) else 0.0
     return precision, recall, f1
 
 
+# Per-worker pipeline, built lazily after fork/spawn so each process owns its
+# own session store and orchestrator (nothing to share or lock across workers).
+_WORKER_SERVICE = None
+_WORKER_ORCHESTRATOR = None
+
+
+def _worker_pipeline() -> Tuple[InMemorySessionService, Any]:
+    global _WORKER_SERVICE, _WORKER_ORCHESTRATOR
+    if _WORKER_ORCHESTRATOR is None:
+        from agents.orchestrator import AgentOrchestrator
+
+        _WORKER_SERVICE = InMemorySessionService()
+        _WORKER_ORCHESTRATOR = AgentOrchestrator(_WORKER_SERVICE)
+    return _WORKER_SERVICE, _WORKER_ORCHESTRATOR
+
+
+def reset_for_tests() -> None:
+    """Drop the cached pipeline (and metric cache) so tests get fresh state."""
+    global _WORKER_SERVICE, _WORKER_ORCHESTRATOR
+    _WORKER_SERVICE = None
+    _WORKER_ORCHESTRATOR = None
+    compute_metrics.cache_clear()
+
+
+def _run_one_sample(sample: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a single manifest sample end to end; module-scope so it pickles."""
+    session_service, orchestrator = _worker_pipeline()
+    session = session_service.ensure_session(
+        None,
+        user_profile=sample.get("user_profile") or {"level": "Intermediate"},
+    )
+    start = time.time()
+    result = orchestrator.run(sample["video"], session, resume=False)
+    latency = time.time() - start
+    predicted_issues = collect_issues(result["evaluations"])
+    precision, recall, f1 = compute_metrics(
+        frozenset(predicted_issues), frozenset(sample.get("expected_issues", ()))
+    )
+    return {
+        "session_id": result["session_id"],
+        "video": sample["video"],
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "latency_sec": latency,
+        "predicted_issues": predicted_issues,
+        "expected_issues": sample.get("expected_issues", []),
+    }
+
+
 def run_manifest_evaluation(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
-    session_service = InMemorySessionService()
-    orchestrator = AgentOrchestrator(session_service)
-    per_sample = []
-    for sample in samples:
-        session = session_service.ensure_session(
-            None,
-            user_profile=sample.get("user_profile") or {"level": "Intermediate"},
-        )
-        start = time.time()
-        result = orchestrator.run(sample["video"], session, resume=False)
-        latency = time.time() - start
-        predicted_issues = collect_issues(result["evaluations"])
-        precision, recall, f1 = compute_metrics(predicted_issues, sample.get("expected_issues", []))
-        per_sample.append(
-            {
-                "session_id": result["session_id"],
-                "video": sample["video"],
-                "precision": precision,
-                "recall": recall,
-                "f1": f1,
-                "latency_sec": latency,
-                "predicted_issues": predicted_issues,
-                "expected_issues": sample.get("expected_issues", []),
-            }
-        )
+    # Samples are independent full-pipeline runs (CPU-heavy vision + eval), so
+    # fan them out across processes; executor.map keeps manifest order.
+    max_workers = min(len(samples), os.cpu_count() or 1)
+    if max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            per_sample = list(executor.map(_run_one_sample, samples))
+    else:
+        per_sample = [_run_one_sample(sample) for sample in samples]
     macro_precision = sum(s["precision"] for s in per_sample) / len(per_sample) if per_sample else 0.0
     macro_recall = sum(s["recall"] for s in per_sample) / len(per_sample) if per_sample else 0.0
     macro_f1 = sum(s["f1"] for s in per_sample) / len(per_sample) if per_sample else 0.0
@@ -111,7 +150,7 @@ def run_mock_evaluation() -> Dict[str, Any]:
     ]
     predicted = collect_issues(synthetic_evaluations)
     expected = ["Racket angle undetected in this sequence"]
-    precision, recall, f1 = compute_metrics(predicted, expected)
+    precision, recall, f1 = compute_metrics(frozenset(predicted), frozenset(expected))
     return {
         "samples": [
             {
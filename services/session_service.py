@@ -9,14 +9,19 @@ course rubric.
 
 from __future__ import annotations
 
-import json
+import atexit
+import mmap
 import os
+import threading
 import time
 import uuid
 from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import orjson
+
 DEFAULT_STORE = Path(os.getenv("SESSION_STORE_PATH", ".cache/session_store.json"))
 
 @dataclass
@@ -27,19 +32,57 @@ class SessionRecord:
     last_result: Optional[Dict[str, Any]] = None
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
+    # Serialized form, cached until updated_at moves; persistence and
+    # dump_sessions share it instead of rebuilding identical dicts.
+    _cached_dict: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+    _cached_at: float = field(default=-1.0, repr=False, compare=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        if self._cached_dict is None or self._cached_at != self.updated_at:
+            self._cached_dict = {
+                "user_profile": self.user_profile,
+                "events": self.events,
+                "last_result": self.last_result,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+            self._cached_at = self.updated_at
+        return self._cached_dict
 
 class InMemorySessionService:
     def __init__(self, *, store_path: Path = DEFAULT_STORE, autosave: bool = True) -> None:
         self.store_path = store_path
         self.autosave = autosave
         self.sessions: Dict[str, SessionRecord] = {}
+        # Guards sessions and disk persistence; the orchestrator mutates
+        # records from worker threads during batch runs.
+        self._lock = threading.Lock()
+        # Per-mutation changes go to an append-only JSON-lines log; the full
+        # snapshot is only rewritten on create_session/compact. This keeps
+        # per-event write cost constant instead of O(store size).
+        self._log_path = self.store_path.with_suffix(".log")
+        self._log_fp = None
+        # Mutations mark the store dirty; a daemon thread folds the log into
+        # the snapshot at most once per interval, so bursts of events cost one
+        # log line each rather than one snapshot rewrite each, and the log
+        # (hence crash-replay time) stays bounded.
+        self._dirty = False
+        self._flush_interval = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.25"))
+        self._stop_flusher = threading.Event()
         self._load_from_disk()
+        if self.autosave:
+            flusher = threading.Thread(
+                target=self._flush_loop, name="session-flush", daemon=True
+            )
+            flusher.start()
+            atexit.register(self._flush_now)
 
     def create_session(self, user_profile: Optional[Dict[str, Any]] = None) -> SessionRecord:
         session_id = uuid.uuid4().hex[:12]
         record = SessionRecord(session_id=session_id, user_profile=user_profile or {})
-        self.sessions[session_id] = record
-        self._persist()
+        with self._lock:
+            self.sessions[session_id] = record
+            self._persist()
         return record
 
     def ensure_session(
@@ -50,9 +93,17 @@ class InMemorySessionService:
         if session_id and session_id in self.sessions:
             record = self.sessions[session_id]
             if user_profile:
-                record.user_profile.update({k: v for k, v in user_profile.items() if v})
-                record.updated_at = time.time()
-                self._persist()
+                with self._lock:
+                    record.user_profile.update({k: v for k, v in user_profile.items() if v})
+                    record.updated_at = time.time()
+                    self._append_log(
+                        {
+                            "sid": session_id,
+                            "op": "profile",
+                            "user_profile": record.user_profile,
+                            "updated_at": record.updated_at,
+                        }
+                    )
             return record
         return self.create_session(user_profile=user_profile)
 
@@ -60,75 +111,161 @@ class InMemorySessionService:
         return self.sessions.get(session_id)
 
     def append_event(self, session_id: str, event_type: str, payload: Dict[str, Any]) -> None:
-        record = self.sessions.setdefault(session_id, SessionRecord(session_id=session_id))
-        record.events.append(
-            {
+        with self._lock:
+            record = self.sessions.setdefault(session_id, SessionRecord(session_id=session_id))
+            event = {
                 "type": event_type,
                 "ts": time.time(),
                 "payload": payload,
             }
-        )
-        record.updated_at = time.time()
-        self._persist()
+            record.events.append(event)
+            record.updated_at = time.time()
+            self._append_log(
+                {"sid": session_id, "op": "event", "event": event, "updated_at": record.updated_at}
+            )
 
     def set_last_result(self, session_id: str, result: Dict[str, Any]) -> None:
-        record = self.sessions.setdefault(session_id, SessionRecord(session_id=session_id))
-        record.last_result = result
-        record.updated_at = time.time()
-        self._persist()
+        with self._lock:
+            record = self.sessions.setdefault(session_id, SessionRecord(session_id=session_id))
+            record.last_result = result
+            record.updated_at = time.time()
+            self._append_log(
+                {"sid": session_id, "op": "last_result", "result": result, "updated_at": record.updated_at}
+            )
+
+    def compact(self) -> None:
+        """Fold the event log into the snapshot file and truncate the log."""
+        with self._lock:
+            self._persist()
+
+    def _flush_loop(self) -> None:
+        while not self._stop_flusher.wait(self._flush_interval):
+            self._flush_now()
+
+    def _flush_now(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._persist()
 
     def get_resume_hint(self, session_id: str) -> Optional[str]:
         record = self.sessions.get(session_id)
         if not record or not record.events:
             return None
         last_event = record.events[-1]
-        return f"Last event '{last_event['type']}' at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_event['ts']))}"
+        # datetime.isoformat avoids the localtime+strftime pair (each re-reads
+        # tz state) on what the UI polls repeatedly.
+        ts_str = datetime.fromtimestamp(last_event["ts"]).isoformat(sep=" ", timespec="seconds")
+        return f"Last event '{last_event['type']}' at {ts_str}"
 
     def dump_sessions(self) -> Dict[str, Any]:
-        return {
-            session_id: {
-                "user_profile": record.user_profile,
-                "events": record.events,
-                "last_result": record.last_result,
-                "created_at": record.created_at,
-                "updated_at": record.updated_at,
-            }
-            for session_id, record in self.sessions.items()
-        }
+        return self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        return {session_id: record.as_dict() for session_id, record in self.sessions.items()}
 
     def _load_from_disk(self) -> None:
-        if not self.store_path.exists():
+        # The journal must replay even when the snapshot is missing or empty:
+        # a crash between log append and first compaction leaves exactly that
+        # shape on disk, and those journal-only mutations are the point of
+        # the log.
+        if self.store_path.exists():
+            try:
+                data = self._read_snapshot()
+                for session_id, payload in data.items():
+                    self.sessions[session_id] = SessionRecord(
+                        session_id=session_id,
+                        user_profile=payload.get("user_profile", {}),
+                        events=payload.get("events", []),
+                        last_result=payload.get("last_result"),
+                        created_at=payload.get("created_at", time.time()),
+                        updated_at=payload.get("updated_at", time.time()),
+                    )
+            except Exception:
+                # Snapshots are written atomically (tmp + rename), so this is
+                # only reachable for a foreign or hand-edited file. Move both
+                # the snapshot and the log aside for inspection — the next
+                # flush would otherwise rename over the snapshot, and a stale
+                # log appended to later could resurrect dead events — and
+                # start fresh.
+                self.store_path.replace(self.store_path.with_suffix(".corrupt"))
+                if self._log_path.exists():
+                    self._log_path.replace(self._log_path.with_suffix(".log.corrupt"))
+                self.sessions = {}
+                return
+        self._replay_log()
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        # Memory-map the snapshot and hand orjson a zero-copy view: the
+        # parser reads straight out of the page cache instead of first
+        # duplicating the whole file into a heap buffer.
+        with open(self.store_path, "rb") as fp:
+            try:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # zero-length snapshot
+                return {}
+            view = memoryview(mm)
+            try:
+                return orjson.loads(view)
+            finally:
+                view.release()
+                mm.close()
+
+    def _replay_log(self) -> None:
+        if not self._log_path.exists():
             return
         try:
-            data = json.loads(self.store_path.read_text(encoding="utf-8"))
-            for session_id, payload in data.items():
-                self.sessions[session_id] = SessionRecord(
-                    session_id=session_id,
-                    user_profile=payload.get("user_profile", {}),
-                    events=payload.get("events", []),
-                    last_result=payload.get("last_result"),
-                    created_at=payload.get("created_at", time.time()),
-                    updated_at=payload.get("updated_at", time.time()),
-                )
+            with open(self._log_path, "rb") as fp:
+                for line in fp:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = orjson.loads(line)
+                    record = self.sessions.setdefault(
+                        entry["sid"], SessionRecord(session_id=entry["sid"])
+                    )
+                    op = entry["op"]
+                    if op == "event":
+                        record.events.append(entry["event"])
+                    elif op == "last_result":
+                        record.last_result = entry["result"]
+                    elif op == "profile":
+                        record.user_profile.update(entry["user_profile"])
+                    record.updated_at = entry.get("updated_at", record.updated_at)
         except Exception:
-            # On corruption, start fresh but keep file for debugging.
-            backup = self.store_path.with_suffix(".corrupt")
-            self.store_path.replace(backup)
-            self.sessions = {}
+            # A torn trailing line after a crash is expected; keep whatever
+            # replayed cleanly up to that point.
+            pass
+
+    def _append_log(self, entry: Dict[str, Any]) -> None:
+        if not self.autosave:
+            return
+        self._dirty = True
+        if self._log_fp is None:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            # Unbuffered binary append: each orjson line hits the OS
+            # immediately, matching the old persist-per-mutation durability.
+            self._log_fp = open(self._log_path, "ab", buffering=0)
+        self._log_fp.write(orjson.dumps(entry) + b"\n")
 
     def _persist(self) -> None:
         if not self.autosave:
             return
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
-        payload = {
-            session_id: {
-                "user_profile": record.user_profile,
-                "events": record.events,
-                "last_result": record.last_result,
-                "created_at": record.created_at,
-                "updated_at": record.updated_at,
-            }
-            for session_id, record in self.sessions.items()
-        }
-        self.store_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        payload = self._snapshot()
+        # Compact orjson bytes written to a sibling tmp file, fsynced, then
+        # renamed over the snapshot: readers never observe a torn file.
+        tmp = self.store_path.with_suffix(".tmp")
+        with open(tmp, "wb") as fp:
+            fp.write(orjson.dumps(payload))
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self.store_path)
+        # The snapshot now covers every mutation, so drop the log; replaying
+        # stale entries on top of the snapshot would double-apply them.
+        if self._log_fp is not None:
+            self._log_fp.close()
+            self._log_fp = None
+        if self._log_path.exists():
+            self._log_path.unlink()
+        self._dirty = False
 
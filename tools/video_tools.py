@@ -4,13 +4,28 @@ video_tools.py
 Helper functions for frame extraction and simple geometric estimators.
 """
 
+import math
+import os
+import threading
+
 import cv2
 import numpy as np
 from pathlib import Path
 from typing import List, Tuple
 
-def extract_frames(video_path, max_frames=300, frame_stride=3):
-    """Yield (timestamp_seconds, image_bgr) tuples for frames sampled from the video."""
+try:  # pragma: no cover
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # pragma: no cover
+    HAVE_NUMBA = False
+    njit = None
+
+def iter_frames(video_path, max_frames=300, frame_stride=3):
+    """Yield (timestamp_seconds, image_bgr) tuples for frames sampled from the video.
+
+    Streaming form: only one decoded frame is alive at a time, so memory stays
+    bounded regardless of clip length.
+    """
     path = Path(video_path)
     if not path.exists():
         raise FileNotFoundError(f"Video path does not exist: {video_path}")
@@ -18,20 +33,231 @@ def extract_frames(video_path, max_frames=300, frame_stride=3):
     if not cap.isOpened():
         raise ValueError(f"Unable to open video: {video_path}")
     fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    frames = []
-    idx = 0
+    try:
+        idx = 0
+        saved = 0
+        while cap.isOpened() and saved < max_frames:
+            # grab() advances the stream without the decode/BGR-convert step,
+            # so skipped frames cost demux only; retrieve() pays the full
+            # decode just for the 1-in-stride frames we keep.
+            if not cap.grab():
+                break
+            if idx % frame_stride == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                ts = idx / fps
+                # retrieve() hands back a freshly allocated buffer per call,
+                # so no defensive copy is needed.
+                yield ts, frame
+                saved += 1
+            idx += 1
+    finally:
+        cap.release()
+
+def extract_frames(video_path, max_frames=300, frame_stride=3):
+    """Materialized list form of iter_frames for callers that need random access."""
+    return list(iter_frames(video_path, max_frames=max_frames, frame_stride=frame_stride))
+
+def extract_frame_stack(video_path, max_frames=300, frame_stride=3):
+    """Sample frames into one preallocated (N, H, W, 3) uint8 tensor.
+
+    A single contiguous block instead of N separately heap-allocated arrays:
+    fewer malloc/free pairs, better locality for downstream per-frame work,
+    and the stack can feed batch detectors without further copying. Returns
+    (timestamps, frames) trimmed to the number of frames actually read.
+    """
+    buf = None
+    timestamps = np.empty(max_frames, dtype=np.float64)
     saved = 0
-    while cap.isOpened() and saved < max_frames:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if idx % frame_stride == 0:
-            ts = idx / fps
-            frames.append((ts, frame.copy()))
-            saved += 1
-        idx += 1
-    cap.release()
-    return frames
+    for ts, frame in iter_frames(video_path, max_frames=max_frames, frame_stride=frame_stride):
+        if buf is None:
+            # Size from the first decoded frame; the CAP_PROP_FRAME_* props
+            # lie on some backends.
+            h, w = frame.shape[:2]
+            buf = np.empty((max_frames, h, w, 3), dtype=np.uint8)
+        np.copyto(buf[saved], frame)
+        timestamps[saved] = ts
+        saved += 1
+    if buf is None:
+        return timestamps[:0], np.empty((0, 0, 0, 3), dtype=np.uint8)
+    return timestamps[:saved], buf[:saved]
+
+def _longest_line_angle_loop(segments):
+    """Return the angle (degrees, 0-180) of the longest segment in an (N, 4) array.
+
+    abs(degrees(atan2(...))) already lands in [0, 180], so no further
+    normalization is needed; math.* beats the NumPy scalar trampoline here.
+    """
+    best_len = -1.0
+    best_angle = 0.0
+    for i in range(segments.shape[0]):
+        dx = segments[i, 2] - segments[i, 0]
+        dy = segments[i, 3] - segments[i, 1]
+        length = dx * dx + dy * dy
+        if length > best_len:
+            best_len = length
+            best_angle = abs(math.degrees(math.atan2(dy, dx)))
+    return best_angle
+
+
+def _longest_line_angle_np(segments):
+    """Vectorized twin of _longest_line_angle_loop: one argmax over squared
+    lengths (sqrt is monotonic, so no hypot), then a single arctan2."""
+    dx = segments[:, 2] - segments[:, 0]
+    dy = segments[:, 3] - segments[:, 1]
+    i = int((dx * dx + dy * dy).argmax())
+    return abs(math.degrees(math.atan2(dy[i], dx[i])))
+
+
+_longest_line_angle = (
+    njit(cache=True, fastmath=True)(_longest_line_angle_loop)
+    if HAVE_NUMBA
+    else _longest_line_angle_np
+)
+
+# Opt-in jitted Hough accumulator (TT_NUMBA_HOUGH=1): votes every edge pixel
+# into a (rho, theta) table and takes the most-voted orientation. This reads
+# "dominant orientation" rather than "longest single segment", so it stays
+# behind a flag instead of silently changing the default heuristic.
+_THETA_COS = np.cos(np.deg2rad(np.arange(180, dtype=np.float64)))
+_THETA_SIN = np.sin(np.deg2rad(np.arange(180, dtype=np.float64)))
+_HOUGH_MIN_VOTES = 20  # matches the HoughLinesP threshold
+# Below this many edge pixels no acceptable line can exist (min segment
+# length plus vote threshold); countNonZero is ~20x cheaper than Hough.
+_MIN_EDGE_PIXELS = 50
+
+
+def _hough_peak_loop(xs, ys, diag, cos_t, sin_t, acc):
+    for i in range(xs.shape[0]):
+        x = xs[i]
+        y = ys[i]
+        for t in range(180):
+            rho = int(round(x * cos_t[t] + y * sin_t[t])) + diag
+            acc[rho, t] += 1
+    best_votes = 0
+    best_theta = -1
+    for r in range(acc.shape[0]):
+        for t in range(180):
+            if acc[r, t] > best_votes:
+                best_votes = acc[r, t]
+                best_theta = t
+    return best_theta, best_votes
+
+
+_hough_peak = njit(cache=True, fastmath=True)(_hough_peak_loop) if HAVE_NUMBA else _hough_peak_loop
+USE_NUMBA_HOUGH = HAVE_NUMBA and os.getenv("TT_NUMBA_HOUGH") == "1"
+
+
+def hough_dominant_angle(edges):
+    """Dominant line angle (degrees, 0-180) from a binary edge map, or None."""
+    ys, xs = np.nonzero(edges)
+    if ys.size < _HOUGH_MIN_VOTES:
+        return None
+    h, w = edges.shape[:2]
+    diag = int(np.ceil(np.hypot(h, w)))
+    # A cell can collect at most one vote per edge pixel, so int16 votes are
+    # safe for the usual downscaled patches and halve accumulator traffic;
+    # oversized inputs fall back to int32.
+    vote_dtype = np.int16 if xs.size <= np.iinfo(np.int16).max else np.int32
+    acc = np.zeros((2 * diag + 1, 180), dtype=vote_dtype)
+    theta, votes = _hough_peak(
+        xs.astype(np.float64), ys.astype(np.float64), diag, _THETA_COS, _THETA_SIN, acc
+    )
+    if votes < _HOUGH_MIN_VOTES:
+        return None
+    # theta parameterizes the line normal; the line direction is 90 deg off.
+    return float((theta + 90) % 180)
+
+# CUDA Canny/Hough detectors, probed lazily: None = not probed yet,
+# False = unavailable, otherwise a (canny, hough) pair. The detectors are
+# stateful, so a lock serializes access when the angle stage runs threaded.
+_CUDA_DETECTORS = None
+_CUDA_LOCK = threading.Lock()
+
+
+def _cuda_detectors():
+    global _CUDA_DETECTORS
+    if _CUDA_DETECTORS is None:
+        try:
+            if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                _CUDA_DETECTORS = (
+                    cv2.cuda.createCannyEdgeDetector(50, 150),
+                    cv2.cuda.createHoughSegmentDetector(1, np.pi / 180, 30, 10),
+                )
+            else:
+                _CUDA_DETECTORS = False
+        except Exception:
+            _CUDA_DETECTORS = False
+    return _CUDA_DETECTORS
+
+
+# Angle estimation only needs line orientation, which survives uniform
+# downscaling; shrinking the patch so its longest side is 128px cuts the
+# Canny+Hough work by ~2.5x on the default 240px patches.
+_PATCH_TARGET = 128
+
+
+def _shrink_patch(patch):
+    """Uniformly downscale so the longest side is _PATCH_TARGET; (patch, scale).
+
+    Uniform scaling keeps orientation intact, so the resulting angle needs no
+    correction — only the Hough length thresholds scale with the patch.
+    """
+    h, w = patch.shape[:2]
+    longest = max(h, w)
+    if longest <= _PATCH_TARGET:
+        return patch, 1.0
+    scale = _PATCH_TARGET / longest
+    resized = cv2.resize(
+        patch,
+        (max(1, round(w * scale)), max(1, round(h * scale))),
+        interpolation=cv2.INTER_AREA,
+    )
+    return resized, scale
+
+
+def _detect_segments(gray, edge_dst=None, min_line_length=30, max_line_gap=10):
+    """Run Canny + probabilistic Hough on a gray patch; (N, 4) float64 or None."""
+    cuda = _cuda_detectors()
+    if cuda:
+        canny, hough = cuda
+        # CUDA Canny misses edges touching the border; replicate-pad by 1px.
+        padded = cv2.copyMakeBorder(gray, 1, 1, 1, 1, cv2.BORDER_REPLICATE)
+        with _CUDA_LOCK:
+            gpu = cv2.cuda_GpuMat()
+            gpu.upload(padded)
+            lines = hough.detect(canny.detect(gpu)).download()
+        if lines is None or lines.size == 0:
+            return None
+        return lines.reshape(-1, 4).astype(np.float64)
+    if edge_dst is not None:
+        edges = cv2.Canny(gray, 50, 150, edges=edge_dst)
+    else:
+        edges = cv2.Canny(gray, 50, 150)
+    # Blank patches (e.g. background near a mis-detected wrist) are common;
+    # skip the Hough transform when no line could clear its thresholds.
+    if cv2.countNonZero(edges) < _MIN_EDGE_PIXELS:
+        return None
+    lines = cv2.HoughLinesP(
+        edges, 1, np.pi/180, threshold=20, minLineLength=min_line_length, maxLineGap=max_line_gap
+    )
+    if lines is None:
+        return None
+    return lines[:, 0, :].astype(np.float64)
+
+# Per-thread gray/edge scratch buffers for the single-shot estimator, sized
+# lazily and reallocated only when the patch shape changes. Thread-local so
+# the parallel angle stage never shares a buffer across workers.
+_TLS = threading.local()
+
+
+def _scratch_buffers(shape):
+    gray = getattr(_TLS, "gray", None)
+    if gray is None or gray.shape != shape:
+        _TLS.gray = np.empty(shape, dtype=np.uint8)
+        _TLS.edges = np.empty(shape, dtype=np.uint8)
+    return _TLS.gray, _TLS.edges
 
 def estimate_line_angle_near_point(img, point, search_radius=100):
     """Search a circular patch around `point` for dominant edge orientation and return angle in degrees."""
@@ -39,28 +265,100 @@ def estimate_line_angle_near_point(img, point, search_radius=100):
     h, w = img.shape[:2]
     x0, y0 = max(0, x-search_radius), max(0, y-search_radius)
     x1, y1 = min(w, x+search_radius), min(h, y+search_radius)
-    patch = img[y0:y1, x0:x1]
-    gray = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
-    edges = cv2.Canny(gray, 50, 150)
-    lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=20, minLineLength=30, maxLineGap=10)
-    if lines is None:
+    # contiguous crop so the downstream OpenCV/Numba stages work on one block
+    patch = np.ascontiguousarray(img[y0:y1, x0:x1])
+    scale = 1.0
+    if not _cuda_detectors():
+        # The CUDA detectors carry fixed length thresholds, so only the CPU
+        # path (where the params scale along) gets the downscaled patch.
+        patch, scale = _shrink_patch(patch)
+    gray_buf, edge_buf = _scratch_buffers(patch.shape[:2])
+    gray = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+    if USE_NUMBA_HOUGH:
+        return hough_dominant_angle(cv2.Canny(gray, 50, 150, edges=edge_buf))
+    segments = _detect_segments(
+        gray,
+        edge_dst=edge_buf,
+        min_line_length=max(5, round(30 * scale)),
+        max_line_gap=max(1, round(10 * scale)),
+    )
+    if segments is None:
         return None
-    # choose the longest line
-    longest = max(lines, key=lambda l: np.hypot(l[0][2]-l[0][0], l[0][3]-l[0][1]))
-    x1, y1, x2, y2 = longest[0]
-    angle_rad = np.arctan2((y2-y1), (x2-x1))
-    angle_deg = np.degrees(angle_rad)
-    # normalize to 0-180
-    angle_deg = abs(angle_deg)
-    if angle_deg > 180:
-        angle_deg = angle_deg % 180
-    return angle_deg
+    # pick the longest line in one compiled pass over the (N, 4) segment array
+    return float(_longest_line_angle(segments))
 
-def compute_angle(a, b, c):
-    """Return angle ABC in degrees given three points a,b,c (x,y)."""
-    a = np.array(a); b = np.array(b); c = np.array(c)
+def batch_estimate_line_angles(frames, points, search_radius=100):
+    """Estimate line angles for many (frame, point) pairs in one call.
+
+    One pair of gray/edge scratch buffers is allocated up front and reused
+    for every interior (full-size) patch via the cv2 dst arguments, so the
+    per-frame OpenCV calls stop churning allocations. Edge-clipped patches
+    and the CUDA path fall back to the single-shot code. A None point maps
+    to a None angle.
+    """
+    size = 2 * search_radius
+    use_buffers = not _cuda_detectors()
+    # Interior patches land at `target` square after the uniform downscale,
+    # so the scratch buffers are sized once for that common case.
+    target = min(size, _PATCH_TARGET)
+    gray_buf = np.empty((target, target), dtype=np.uint8)
+    edge_buf = np.empty((target, target), dtype=np.uint8)
+    angles = []
+    for img, point in zip(frames, points):
+        if point is None:
+            angles.append(None)
+            continue
+        x, y = int(point[0]), int(point[1])
+        h, w = img.shape[:2]
+        x0, y0 = max(0, x - search_radius), max(0, y - search_radius)
+        x1, y1 = min(w, x + search_radius), min(h, y + search_radius)
+        patch = np.ascontiguousarray(img[y0:y1, x0:x1])
+        scale = 1.0
+        if use_buffers:
+            patch, scale = _shrink_patch(patch)
+        min_len = max(5, round(30 * scale))
+        max_gap = max(1, round(10 * scale))
+        if use_buffers and patch.shape[0] == target and patch.shape[1] == target:
+            gray = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+            edges = cv2.Canny(gray, 50, 150, edges=edge_buf)
+            if USE_NUMBA_HOUGH:
+                angles.append(hough_dominant_angle(edges))
+                continue
+            if cv2.countNonZero(edges) < _MIN_EDGE_PIXELS:
+                angles.append(None)
+                continue
+            lines = cv2.HoughLinesP(
+                edges, 1, np.pi/180, threshold=20, minLineLength=min_len, maxLineGap=max_gap
+            )
+            segments = None if lines is None else lines[:, 0, :].astype(np.float64)
+        elif USE_NUMBA_HOUGH:
+            gray = cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY)
+            angles.append(hough_dominant_angle(cv2.Canny(gray, 50, 150)))
+            continue
+        else:
+            segments = _detect_segments(
+                cv2.cvtColor(patch, cv2.COLOR_BGR2GRAY),
+                min_line_length=min_len,
+                max_line_gap=max_gap,
+            )
+        angles.append(None if segments is None else float(_longest_line_angle(segments)))
+    return angles
+
+def compute_angles(a, b, c):
+    """Return angles ABC in degrees for batches of points.
+
+    a, b, c are (N, 2) arrays (vertex at b); one branchless vectorized pass
+    replaces N scalar dot/norm/arccos round-trips through the interpreter.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
     ba = a - b
     bc = c - b
-    cosang = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-8)
-    ang = np.degrees(np.arccos(np.clip(cosang, -1.0, 1.0)))
-    return ang
+    num = (ba * bc).sum(-1)
+    den = np.sqrt((ba * ba).sum(-1) * (bc * bc).sum(-1)) + 1e-8
+    return np.degrees(np.arccos(np.clip(num / den, -1.0, 1.0)))
+
+def compute_angle(a, b, c):
+    """Return angle ABC in degrees given three points a,b,c (x,y)."""
+    return float(compute_angles(np.asarray(a)[None], np.asarray(b)[None], np.asarray(c)[None])[0])
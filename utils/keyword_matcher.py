@@ -0,0 +1,70 @@
+"""
+keyword_matcher.py
+
+Pure-Python Aho-Corasick automaton for matching many keywords against short
+strings in a single pass. Replaces N-way `keyword in text` scans whose cost
+grows with the rule library; one DFA traversal over the text finds every
+keyword simultaneously. No external dependency needed at this scale.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Iterator
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern substring matcher. Add (word, payload) pairs, then iterate
+    payloads for every word occurring in a text. Case handling is the
+    caller's responsibility: add lowercase words and feed lowercase text.
+    """
+
+    def __init__(self) -> None:
+        self._goto: list[dict] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list] = [[]]
+        self._built = False
+
+    def add_word(self, word: str, payload: Any) -> None:
+        if self._built:
+            raise RuntimeError("Cannot add words after the automaton is built.")
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                next_state = len(self._goto) - 1
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(payload)
+
+    def build(self) -> "KeywordMatcher":
+        """Compute failure links (breadth-first); called lazily on first match."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fallback = self._goto[fail].get(char, 0)
+                self._fail[child] = 0 if fallback == child else fallback
+                self._output[child].extend(self._output[self._fail[child]])
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Any]:
+        """Yield the payload of every added word found in `text`."""
+        if not self._built:
+            self.build()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for payload in self._output[state]:
+                yield payload